@@ -0,0 +1,37 @@
+"""JSON helpers that use orjson when it is installed."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without the extra
+    orjson = None  # type: ignore[assignment]
+
+JSONDecodeError = json.JSONDecodeError
+
+# json.dumps builds a new encoder whenever options are passed; reuse ours
+_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+_INDENT_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Deserialize JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize ``obj`` to UTF-8 encoded JSON bytes.
+
+    Args:
+        obj: Object to serialize
+        indent: Pretty-print with two-space indentation
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    encoder = _INDENT_ENCODER if indent else _ENCODER
+    return encoder.encode(obj).encode("utf-8")
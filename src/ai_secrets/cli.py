@@ -1,19 +1,62 @@
 from __future__ import annotations
 
-import json
+import re
+import shlex
 import sys
 from enum import Enum
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, NoReturn, Optional, TextIO
 
 import typer
-from rich.console import Console
-from rich.table import Table
 
+from . import _json
 from .storage import SecretsStore
 
+if TYPE_CHECKING:
+    from rich.console import Console
+    from rich.table import Table
+
 app = typer.Typer(help="AI-friendly Secrets Management CLI")
-console = Console(force_terminal=True, legacy_windows=False)
+
+
+@lru_cache(maxsize=None)
+def _console() -> Console:
+    """Create the shared Rich console on first use.
+
+    Rich is only imported when human-readable output is printed, so JSON
+    invocations don't pay its import cost.
+    """
+    from rich.console import Console
+
+    return Console(force_terminal=True, legacy_windows=False)
+
+
+# Tables returned by _release_table, reused when the app runs repeatedly in-process
+_TABLE_POOL: list[Table] = []
+
+
+def _acquire_table() -> Table:
+    """Take an empty table from the pool, creating one if the pool is empty."""
+    if _TABLE_POOL:
+        return _TABLE_POOL.pop()
+    from rich.table import Table
+
+    return Table()
+
+
+def _release_table(table: Table) -> None:
+    """Clear a rendered table and return it to the pool."""
+    table.columns.clear()
+    table.rows.clear()
+    _TABLE_POOL.append(table)
+
+
+# Names `export -f bash` can emit as shell variables
+_ENV_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*\Z")
+
+# Above this many secrets `list` prints plain names instead of a Rich table
+TABLE_MAX_ROWS = 100
 
 
 class OutputFormat(str, Enum):
@@ -23,6 +66,25 @@ class OutputFormat(str, Enum):
     BASH = "bash"
 
 
+def print_json(data: Any, file: Optional[TextIO] = None) -> None:
+    """Print data as JSON.
+
+    Output is indented for interactive terminals and compact when piped,
+    which is how agents and scripts consume it.
+    """
+    stream = file if file is not None else sys.stdout
+    payload = _json.dumps(data, indent=stream.isatty()) + b"\n"
+    # Write the UTF-8 bytes directly: a text stream with a legacy encoding
+    # (cp1252 when piped on Windows) can't encode every secret value
+    buffer = getattr(stream, "buffer", None)
+    if buffer is None:
+        stream.write(payload.decode("utf-8"))
+        return
+    stream.flush()
+    buffer.write(payload)
+    buffer.flush()
+
+
 def output_result(
     result: dict[str, Any],
     format: OutputFormat,
@@ -31,11 +93,11 @@ def output_result(
 ) -> None:
     """Output result in specified format."""
     if format == OutputFormat.JSON:
-        print(json.dumps(result, indent=2))
+        print_json(result)
     else:
         style = "bold red" if error else None
         prefix = "[red]Error:[/red]" if error else "[green]✓[/green]"
-        console.print(f"{prefix} {success_msg}", style=style)
+        _console().print(f"{prefix} {success_msg}", style=style)
 
 
 @app.callback()
@@ -50,11 +112,11 @@ def main(
 ) -> None:
     """Initialize store based on global options."""
     if not service_name or not service_name.strip():
-        console.print("[red]Error:[/red] service-name cannot be empty")
+        _console().print("[red]Error:[/red] service-name cannot be empty")
         raise typer.Exit(1)
 
     if base_dir and not base_dir.parent.exists():
-        console.print(f"[red]Error:[/red] Parent directory does not exist: {base_dir.parent}")
+        _console().print(f"[red]Error:[/red] Parent directory does not exist: {base_dir.parent}")
         raise typer.Exit(1)
 
     ctx.obj = {"store": SecretsStore(service_name=service_name.strip(), base_dir=base_dir)}
@@ -81,15 +143,15 @@ def set(
             "message": f"Secret '{name}' stored securely in OS keyring",
         }
         if format == OutputFormat.JSON:
-            print(json.dumps(result, indent=2))
+            print_json(result)
         else:
-            console.print(f"[green]✓[/green] Secret '{name}' stored securely")
+            _console().print(f"[green]✓[/green] Secret '{name}' stored securely")
     except (ValueError, OSError) as e:
         error = {"error": str(e), "name": name}
         if format == OutputFormat.JSON:
-            print(json.dumps(error, indent=2))
+            print_json(error)
         else:
-            console.print(f"[red]Error:[/red] {e}", style="bold red")
+            _console().print(f"[red]Error:[/red] {e}", style="bold red")
         raise typer.Exit(1)
 
 
@@ -114,9 +176,9 @@ def get(
         if value is None:
             error = {"success": False, "error": f"Secret '{name}' not found", "name": name}
             if format == OutputFormat.JSON:
-                print(json.dumps(error, indent=2))
+                print_json(error)
             else:
-                console.print(f"[red]Error:[/red] Secret '{name}' not found")
+                _console().print(f"[red]Error:[/red] Secret '{name}' not found")
             raise typer.Exit(1)
 
         # AI-friendly: in JSON mode with --reveal, always include value
@@ -127,21 +189,21 @@ def get(
             result["value"] = value
 
         if format == OutputFormat.JSON:
-            print(json.dumps(result, indent=2))
+            print_json(result)
         else:
             if print_value:
-                console.print(f"{name}: {value}")
+                _console().print(f"{name}: {value}")
             else:
-                console.print(f"[green]✓[/green] Secret '{name}' exists")
-                console.print(
+                _console().print(f"[green]✓[/green] Secret '{name}' exists")
+                _console().print(
                     "\n[yellow]Use --print to display value (insecure!)[/yellow]"
                 )
     except (ValueError, OSError) as e:
         error = {"success": False, "error": str(e), "name": name}
         if format == OutputFormat.JSON:
-            print(json.dumps(error, indent=2))
+            print_json(error)
         else:
-            console.print(f"[red]Error:[/red] {e}", style="bold red")
+            _console().print(f"[red]Error:[/red] {e}", style="bold red")
         raise typer.Exit(1)
 
 
@@ -158,27 +220,43 @@ def list(
         secrets = store.list_names()
 
         if format == OutputFormat.JSON:
-            print(json.dumps({"success": True, "secrets": secrets, "count": len(secrets)}, indent=2))
+            print_json({"success": True, "secrets": secrets, "count": len(secrets)})
         elif format == OutputFormat.TABLE:
             if not secrets:
-                console.print("[yellow]No secrets stored[/yellow]")
+                _console().print("[yellow]No secrets stored[/yellow]")
                 return
-            table = Table()
+            secrets.sort()
+            if len(secrets) > TABLE_MAX_ROWS:
+                # Rich table layout is costly for large stores; print plain names
+                _console().print("\n".join(secrets), markup=False, highlight=False)
+                return
+            table = _acquire_table()
             table.add_column("Name")
-            for name in sorted(secrets):
+            for name in secrets:
                 table.add_row(name)
-            console.print(table)
+            _console().print(table)
+            _release_table(table)
         else:
-            console.print(f"[yellow]Unknown format:[/yellow] {format}")
+            _console().print(f"[yellow]Unknown format:[/yellow] {format}")
     except (ValueError, OSError) as e:
         error = {"error": str(e)}
         if format == OutputFormat.JSON:
-            print(json.dumps(error, indent=2))
+            print_json(error)
         else:
-            console.print(f"[red]Error:[/red] {e}", style="bold red")
+            _console().print(f"[red]Error:[/red] {e}", style="bold red")
         raise typer.Exit(1)
 
 
+def _report_not_found(name: str, format: OutputFormat) -> NoReturn:
+    """Report that a secret to delete doesn't exist and exit with code 1."""
+    error = {"error": f"Secret '{name}' not found"}
+    if format == OutputFormat.JSON:
+        print_json(error)
+    else:
+        _console().print(f"[red]Error:[/red] Secret '{name}' not found")
+    raise typer.Exit(1)
+
+
 @app.command()
 def delete(
     ctx: typer.Context,
@@ -191,44 +269,44 @@ def delete(
     """Delete secret from OS keyring."""
     try:
         store: SecretsStore = ctx.obj["store"]
-        exists = store.get(name) is not None
-        if not exists:
-            error = {"error": f"Secret '{name}' not found"}
-            if format == OutputFormat.JSON:
-                print(json.dumps(error, indent=2))
-            else:
-                console.print(f"[red]Error:[/red] Secret '{name}' not found")
-            raise typer.Exit(1)
-
         if not yes:
+            # Report a missing secret before asking for confirmation; with
+            # --yes the delete call itself tells us, saving a keyring lookup
+            if store.get(name) is None:
+                _report_not_found(name, format)
             if format == OutputFormat.JSON:
                 error = {
                     "error": "Confirmation required. Use --yes to confirm deletion"
                 }
-                print(json.dumps(error, indent=2))
+                print_json(error)
                 raise typer.Exit(1)
+            elif not sys.stdin.isatty():
+                # Nobody can answer the prompt; fail instead of blocking
+                _console().print("[red]Error:[/red] non-interactive stdin requires --yes")
+                raise typer.Exit(2)
             else:
-                console.print(
+                _console().print(
                     f"[yellow]Warning:[/yellow] This will permanently delete secret: {name}"
                 )
                 confirm = typer.confirm("Are you sure?", default=False)
                 if not confirm:
-                    console.print("Deletion cancelled")
+                    _console().print("Deletion cancelled")
                     raise typer.Exit(0)
 
-        store.delete(name)
+        if not store.delete(name):
+            _report_not_found(name, format)
 
         result = {"success": True, "name": name, "deleted": True}
         if format == OutputFormat.JSON:
-            print(json.dumps(result, indent=2))
+            print_json(result)
         else:
-            console.print(f"[green]✓[/green] Secret '{name}' deleted")
+            _console().print(f"[green]✓[/green] Secret '{name}' deleted")
     except (ValueError, OSError) as e:
         error = {"error": str(e), "name": name}
         if format == OutputFormat.JSON:
-            print(json.dumps(error, indent=2))
+            print_json(error)
         else:
-            console.print(f"[red]Error:[/red] {e}", style="bold red")
+            _console().print(f"[red]Error:[/red] {e}", style="bold red")
         raise typer.Exit(1)
 
 
@@ -242,7 +320,6 @@ def export(
     """Export secrets as environment variables (WARNING: exposes secrets in plaintext!)."""
     try:
         store: SecretsStore = ctx.obj["store"]
-        exports = store.export_env()
         
         if format == OutputFormat.BASH:
             # Print warning to stderr using standard print
@@ -250,15 +327,27 @@ def export(
                 "WARNING: This exposes secrets in plaintext!",
                 file=sys.stderr
             )
-            for name, value in exports.items():
-                print(f"export {name}={value}")
+            # Stream so at most MAX_WORKERS values are held ahead of printing.
+            # If a keyring lookup fails midway, the lines already printed stay
+            # on stdout and the error goes to stderr with exit code 1.
+            for name, value in store.iter_secrets():
+                # Names are written unquoted, so anything but a plain shell
+                # variable name could inject commands under eval
+                if not _ENV_NAME.match(name):
+                    print(
+                        f"WARNING: Skipping {name!r}: not a valid environment variable name",
+                        file=sys.stderr,
+                    )
+                    continue
+                print(f"export {name}={shlex.quote(value)}")
         elif format == OutputFormat.JSON:
-            print(json.dumps({"success": True, "secrets": exports, "count": len(exports)}, indent=2))
+            exports = store.export_env()
+            print_json({"success": True, "secrets": exports, "count": len(exports)})
         else:
-            console.print(f"[yellow]Unknown format:[/yellow] {format}")
+            _console().print(f"[yellow]Unknown format:[/yellow] {format}")
     except (ValueError, OSError) as e:
         error = {"error": str(e)}
-        print(json.dumps(error, indent=2), file=sys.stderr)
+        print_json(error, file=sys.stderr)
         raise typer.Exit(1)
 
 
@@ -281,20 +370,21 @@ def status(
             "secrets": secrets,
         }
         if format == OutputFormat.JSON:
-            print(json.dumps(status_data, indent=2))
+            print_json(status_data)
         elif format == OutputFormat.TABLE:
-            console.print(f"[bold]Secrets Manager Status[/bold]\n")
-            console.print(f"Service Name: {store.service_name}")
-            console.print(f"Secrets File: {store.metadata_file}")
-            console.print(f"Secrets Count: {len(secrets)}")
+            _console().print(f"[bold]Secrets Manager Status[/bold]\n")
+            _console().print(f"Service Name: {store.service_name}")
+            _console().print(f"Secrets File: {store.metadata_file}")
+            _console().print(f"Secrets Count: {len(secrets)}")
             if secrets:
-                console.print(f"\nStored Secrets: {', '.join(secrets)}")
+                secrets.sort()
+                _console().print("\nStored Secrets: " + ", ".join(secrets), markup=False, highlight=False)
         else:
-            console.print(f"[yellow]Unknown format:[/yellow] {format}")
+            _console().print(f"[yellow]Unknown format:[/yellow] {format}")
     except (ValueError, OSError) as e:
         error = {"error": str(e)}
         if format == OutputFormat.JSON:
-            print(json.dumps(error, indent=2))
+            print_json(error)
         else:
-            console.print(f"[red]Error:[/red] {e}", style="bold red")
+            _console().print(f"[red]Error:[/red] {e}", style="bold red")
         raise typer.Exit(1)
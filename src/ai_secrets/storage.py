@@ -1,10 +1,57 @@
 from __future__ import annotations
 
-import json
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional, TypeVar
 
 import keyring
+from keyring.backend import KeyringBackend
+from keyring.errors import PasswordDeleteError
+
+from . import _json
+
+# Upper bound on concurrent keyring calls for batch operations
+MAX_WORKERS = 16
+
+# Schema version written to JSON metadata files ({"v": 1, "secrets": [...]})
+METADATA_VERSION = 1
+
+_T = TypeVar("_T")
+
+# Replaces path separators in service names with "_" in a single pass
+_PATH_SANITIZE = str.maketrans({"/": "_", "\\": "_"})
+
+
+def _clean_name(name: str) -> str:
+    """Validate a secret name and return it without surrounding whitespace."""
+    if not name or not name.strip():
+        raise ValueError("Secret name cannot be empty")
+    return name.strip()
+
+
+def _settle(
+    futures: list[tuple[str, Future[_T]]],
+) -> tuple[list[tuple[str, _T]], Optional[BaseException]]:
+    """Wait for per-name futures without stopping at the first failure.
+    
+    Returns:
+        Tuple of (name, result) pairs for the calls that succeeded and the
+        first error raised, if any
+    """
+    done: list[tuple[str, _T]] = []
+    error: Optional[BaseException] = None
+    for name, future in futures:
+        exc = future.exception()
+        if exc is None:
+            done.append((name, future.result()))
+        elif error is None:
+            error = exc
+    return done, error
 
 
 class SecretsStore:
@@ -17,23 +64,80 @@ class SecretsStore:
     Args:
         service_name: Namespace for storing secrets in keyring (default: "ai-secrets")
         base_dir: Directory for metadata file (default: ~/.secrets)
+        enable_cache: Keep retrieved values in memory to avoid repeated keyring
+            lookups (default: False)
+        cache_ttl: Seconds a cached value stays valid (default: 300.0)
+        legacy_format: Keep the metadata index as a single JSON document. When
+            False, an append-only log is used instead so adding or removing a
+            name writes one line rather than the whole index. If only a JSON
+            index exists, the log is seeded from it on first read; the JSON
+            file is left in place but no longer updated (default: True)
         
     Attributes:
         service_name: The keyring service namespace
         base_dir: Directory containing metadata.json
         metadata_file: Path to metadata index file
+        legacy_format: Whether the metadata index is stored as JSON document
     """
 
+    __slots__ = (
+        "service_name",
+        "base_dir",
+        "legacy_format",
+        "metadata_file",
+        "_cache_enabled",
+        "_cache_ttl",
+        "_cache",
+        "_names_cache",
+        "_names_set",
+        "_names_stamp",
+        "_log_lines",
+        "_backend",
+    )
+
+    #: Compact the metadata log once it holds this many lines per live name.
+    COMPACT_RATIO = 2
+
     def __init__(
-        self, service_name: str = "ai-secrets", base_dir: Optional[Path] = None
+        self,
+        service_name: str = "ai-secrets",
+        base_dir: Optional[Path] = None,
+        enable_cache: bool = False,
+        cache_ttl: float = 300.0,
+        legacy_format: bool = True,
     ) -> None:
         if not service_name or not service_name.strip():
             raise ValueError("service_name cannot be empty")
         self.service_name = service_name.strip()
         self.base_dir = base_dir or Path.home() / ".secrets"
+        self.legacy_format = legacy_format
         # Service-specific metadata file to avoid conflicts
-        safe_service_name = self.service_name.replace("/", "_").replace("\\", "_")
-        self.metadata_file = self.base_dir / f"metadata_{safe_service_name}.json"
+        safe_service_name = self.service_name.translate(_PATH_SANITIZE)
+        suffix = "json" if legacy_format else "log"
+        self.metadata_file = self.base_dir / f"metadata_{safe_service_name}.{suffix}"
+        self._cache_enabled = enable_cache
+        self._cache_ttl = cache_ttl
+        self._cache: dict[str, tuple[str, float]] = {}
+        self._names_cache: Optional[list[str]] = None
+        self._names_set: Optional[set[str]] = None
+        self._names_stamp: tuple[int, int] = (0, 0)
+        self._log_lines = 0
+        self._backend: Optional[KeyringBackend] = None
+
+    @property
+    def backend(self) -> KeyringBackend:
+        """Keyring backend used for all secret operations.
+        
+        Resolved via ``keyring.get_keyring()`` on first use and reused
+        afterwards. Assign a backend instance to override it (e.g. in tests).
+        """
+        if self._backend is None:
+            self._backend = keyring.get_keyring()
+        return self._backend
+
+    @backend.setter
+    def backend(self, backend: KeyringBackend) -> None:
+        self._backend = backend
 
     def _setup_dirs(self) -> None:
         """Create base directory with secure permissions (0o700)."""
@@ -45,23 +149,175 @@ class SecretsStore:
     def _load_names(self) -> list[str]:
         """Load secret names from metadata file.
         
+        The parsed names are memoized and reused until the file's mtime or
+        size changes.
+        
         Returns:
             List of secret names, empty list if file doesn't exist or is invalid.
         """
-        if not self.metadata_file.exists():
+        return list(self._current_names())
+
+    def _current_names(self) -> list[str]:
+        """Return the memoized names list itself, re-parsing it if stale.
+        
+        Callers must not mutate the result; ``_load_names`` returns a copy.
+        """
+        try:
+            st = self.metadata_file.stat()
+        except FileNotFoundError:
+            self._names_cache = None
+            self._names_set = None
+            self._log_lines = 0
+            if not self.legacy_format:
+                # Switching an existing store to the log keeps its secrets
+                return self._seed_log()
             return []
+        except OSError as e:
+            raise OSError(f"Failed to read metadata file {self.metadata_file}: {e}") from e
+        stamp = (st.st_mtime_ns, st.st_size)
+        if self._names_cache is None or stamp != self._names_stamp:
+            self._names_cache = self._parse_names()
+            self._names_set = set(self._names_cache)
+            self._names_stamp = stamp
+        return self._names_cache
+
+    def _has_name(self, name: str) -> bool:
+        """Check whether the metadata index lists ``name``."""
+        self._current_names()
+        return self._names_set is not None and name in self._names_set
+
+    def _remember_names(self, names: list[str]) -> None:
+        """Refresh the memoized names after writing the metadata file ourselves."""
         try:
-            data = json.loads(self.metadata_file.read_text(encoding='utf-8'))
+            st = self.metadata_file.stat()
+        except OSError:
+            self._names_cache = None
+            self._names_set = None
+            return
+        self._names_cache = list(names)
+        self._names_set = set(names)
+        self._names_stamp = (st.st_mtime_ns, st.st_size)
+
+    def _parse_names(self) -> list[str]:
+        """Parse secret names from the metadata file on disk."""
+        if not self.legacy_format:
+            names, self._log_lines = self._read_log()
+            return names
+        return self._read_json(self.metadata_file)
+
+    def _read_json(self, path: Path) -> list[str]:
+        """Parse secret names from a JSON metadata index.
+        
+        Raises:
+            ValueError: If the file is not valid JSON
+            OSError: If the file cannot be read
+        """
+        try:
+            data = _json.loads(path.read_bytes())
+            if data.get("v") == METADATA_VERSION:
+                return data["secrets"]
+            # Files written before the schema was versioned
             secrets = data.get("secrets", [])
             if isinstance(secrets, dict):
                 return list(secrets.keys())
             if not isinstance(secrets, list):
                 return []
             return secrets
-        except json.JSONDecodeError as e:
+        except _json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in metadata file {path}: {e}") from e
+        except OSError as e:
+            raise OSError(f"Failed to read metadata file {path}: {e}") from e
+
+    def _seed_log(self) -> list[str]:
+        """Create the metadata log from an existing JSON index, if there is one.
+        
+        Returns:
+            Names copied into the new log, empty if there was no JSON index
+        """
+        legacy_file = self.metadata_file.with_suffix(".json")
+        if not legacy_file.exists():
+            return []
+        names = self._read_json(legacy_file)
+        if names:
+            self._save_names(names)
+        return list(names)
+
+    def _read_log(self) -> tuple[list[str], int]:
+        """Replay the metadata log.
+        
+        Returns:
+            Tuple of live secret names (in insertion order) and the number of
+            log lines read.
+            
+        Raises:
+            ValueError: If a log line is not valid JSON
+            OSError: If metadata file cannot be read
+        """
+        names: dict[str, None] = {}
+        count = 0
+        try:
+            with self.metadata_file.open("rb") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    count += 1
+                    entry = _json.loads(line)
+                    if entry.get("op") == "del":
+                        names.pop(entry["name"], None)
+                    else:
+                        names[entry["name"]] = None
+        except (_json.JSONDecodeError, KeyError, AttributeError) as e:
             raise ValueError(f"Invalid JSON in metadata file {self.metadata_file}: {e}") from e
         except OSError as e:
             raise OSError(f"Failed to read metadata file {self.metadata_file}: {e}") from e
+        return list(names), count
+
+    def _append_log(self, op: str, name: str) -> None:
+        """Append a single add/del record to the metadata log.
+        
+        Raises:
+            OSError: If directory creation or file write fails
+        """
+        self._setup_dirs()
+        line = _json.dumps({"op": op, "name": name}) + b"\n"
+        try:
+            fd = os.open(self.metadata_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+            try:
+                os.write(fd, line)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            raise OSError(f"Failed to write metadata file {self.metadata_file}: {e}") from e
+        if self._names_cache is not None:
+            names = [n for n in self._names_cache if n != name]
+            if op == "add":
+                names.append(name)
+            self._remember_names(names)
+            self._log_lines += 1
+
+    def compact(self) -> bool:
+        """Rewrite the metadata log with one record per live name.
+        
+        Only does work when the log has grown past ``COMPACT_RATIO`` lines per
+        live name. No-op for the legacy JSON format.
+        
+        Returns:
+            True if the log was rewritten, False otherwise
+            
+        Raises:
+            ValueError: If metadata file is invalid
+            OSError: If metadata file cannot be read or written
+        """
+        if self.legacy_format:
+            return False
+        # The line count is tracked alongside the memoized names, so this
+        # only re-reads the log if another process changed it
+        names = self._current_names()
+        if self._log_lines <= self.COMPACT_RATIO * len(names):
+            return False
+        self._save_names(names)
+        return True
 
     def _save_names(self, names: list[str]) -> None:
         """Save secret names to metadata file with secure permissions.
@@ -73,13 +329,28 @@ class SecretsStore:
             OSError: If directory creation or file write fails
         """
         self._setup_dirs()
+        if self.legacy_format:
+            payload = _json.dumps({"v": METADATA_VERSION, "secrets": names}, indent=True)
+        else:
+            payload = b"".join(_json.dumps({"op": "add", "name": n}) + b"\n" for n in names)
+        # Write to a private (0o600) temp file and rename it into place so the
+        # index is never observed half-written or with default permissions.
         try:
-            self.metadata_file.write_text(
-                json.dumps({"secrets": names}, indent=2), encoding='utf-8'
-            )
-            self.metadata_file.chmod(0o600)
+            fd, tmp = tempfile.mkstemp(dir=self.base_dir, prefix=".meta.")
+            try:
+                try:
+                    os.write(fd, payload)
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+                os.replace(tmp, self.metadata_file)
+            except BaseException:
+                os.unlink(tmp)
+                raise
         except OSError as e:
             raise OSError(f"Failed to write metadata file {self.metadata_file}: {e}") from e
+        self._log_lines = len(names)
+        self._remember_names(names)
 
     def set(self, name: str, value: str) -> None:
         """Store secret in OS keyring and update metadata.
@@ -92,20 +363,42 @@ class SecretsStore:
             ValueError: If name or value is empty
             OSError: If keyring or metadata update fails
         """
-        if not name or not name.strip():
-            raise ValueError("Secret name cannot be empty")
+        name = _clean_name(name)
         if not value:
             raise ValueError("Secret value cannot be empty")
             
-        try:
-            keyring.set_password(self.service_name, name.strip(), value)
-        except Exception as e:
-            raise OSError(f"Failed to store secret in keyring: {e}") from e
+        self._store(name, value)
             
-        names = self._load_names()
-        if name not in names:
-            names.append(name)
-            self._save_names(names)
+        # Values live in the keyring, so overwriting a known name needs no
+        # metadata write at all
+        if self._has_name(name):
+            return
+        if not self.legacy_format:
+            self._append_log("add", name)
+        else:
+            self._save_names(self._current_names() + [name])
+
+    def set_many(self, items: dict[str, str]) -> None:
+        """Store several secrets, updating the metadata index once.
+        
+        If a keyring write fails, the secrets that were stored are still
+        indexed before the error is raised.
+        
+        Args:
+            items: Mapping of secret names to values
+            
+        Raises:
+            ValueError: If any name or value is empty
+            OSError: If keyring or metadata update fails
+        """
+        pending: dict[str, str] = {}
+        for name, value in items.items():
+            name = _clean_name(name)
+            if not value:
+                raise ValueError("Secret value cannot be empty")
+            pending[name] = value
+        if pending:
+            self._store_indexed(list(pending.items()), self._load_names())
 
     def get(self, name: str) -> Optional[str]:
         """Retrieve secret value from OS keyring.
@@ -119,14 +412,24 @@ class SecretsStore:
         Raises:
             OSError: If keyring access fails
         """
-        if not name or not name.strip():
-            raise ValueError("Secret name cannot be empty")
-            
+        return self._fetch(_clean_name(name))
+
+    def _fetch(self, name: str) -> Optional[str]:
+        """Read an already validated secret name, consulting the cache first."""
+        if self._cache_enabled:
+            cached = self._cache.get(name)
+            if cached is not None and time.monotonic() - cached[1] < self._cache_ttl:
+                return cached[0]
+
         try:
-            return keyring.get_password(self.service_name, name.strip())
+            value = self.backend.get_password(self.service_name, name)
         except Exception as e:
             raise OSError(f"Failed to retrieve secret from keyring: {e}") from e
 
+        if self._cache_enabled and value is not None:
+            self._cache[name] = (value, time.monotonic())
+        return value
+
     def delete(self, name: str) -> bool:
         """Delete secret from OS keyring and metadata.
         
@@ -140,22 +443,139 @@ class SecretsStore:
             ValueError: If name is empty
             OSError: If keyring or metadata update fails
         """
-        if not name or not name.strip():
-            raise ValueError("Secret name cannot be empty")
-            
-        if self.get(name) is None:
+        name = _clean_name(name)
+        if not self._remove(name):
             return False
             
+        if self._has_name(name):
+            if not self.legacy_format:
+                self._append_log("del", name)
+                self.compact()
+            else:
+                self._save_names([n for n in self._current_names() if n != name])
+        return True
+
+    def _store(self, name: str, value: str) -> None:
+        """Write an already validated secret to the keyring."""
+        self._cache.pop(name, None)
         try:
-            keyring.delete_password(self.service_name, name.strip())
+            self.backend.set_password(self.service_name, name, value)
+        except Exception as e:
+            raise OSError(f"Failed to store secret in keyring: {e}") from e
+
+    def _remove(self, name: str) -> bool:
+        """Delete an already validated secret from the keyring.
+        
+        Returns:
+            True if the entry was deleted, False if it didn't exist
+        """
+        self._cache.pop(name, None)
+        try:
+            self.backend.delete_password(self.service_name, name)
+        except PasswordDeleteError:
+            # Backends raise this when the entry does not exist
+            return False
         except Exception as e:
             raise OSError(f"Failed to delete secret from keyring: {e}") from e
+        return True
+
+    def copy_from(self, other: SecretsStore, *, overwrite: bool = False) -> int:
+        """Copy all secrets from another store into this one.
+        
+        Keyring reads and writes run concurrently and the metadata index is
+        written once at the end instead of once per secret.
+        
+        Args:
+            other: Store to copy secrets from
+            overwrite: Replace secrets that already exist in this store
+            
+        Returns:
+            Number of secrets copied
             
+        Raises:
+            ValueError: If either metadata file is invalid
+            OSError: If keyring access or metadata update fails
+        """
+        # A missing source index (e.g. an already migrated store) costs one
+        # stat; neither store touches the keyring in that case
+        source = other._load_names()
+        if not source:
+            return 0
         names = self._load_names()
-        if name in names:
-            names.remove(name)
-            self._save_names(names)
-        return True
+        existing = set(names)
+        pending = [n for n in source if overwrite or n not in existing]
+        if not pending:
+            return 0
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(pending))) as executor:
+            values = executor.map(other._fetch, pending)
+            items = [(n, v) for n, v in zip(pending, values) if v]
+        return len(self._store_indexed(items, names))
+
+    def _store_indexed(self, items: list[tuple[str, str]], names: list[str]) -> list[str]:
+        """Store validated secrets concurrently and index the new names once.
+        
+        Every write is awaited before the first keyring error is re-raised,
+        and the names that did land are indexed first, so no secret is left
+        in the keyring without a metadata entry.
+        
+        Args:
+            items: Secret names and values to store
+            names: Current metadata index
+            
+        Returns:
+            Names that were stored
+            
+        Raises:
+            OSError: If a keyring write or the metadata update fails
+        """
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(items))) as executor:
+            futures = [(n, executor.submit(self._store, n, v)) for n, v in items]
+        done, error = _settle(futures)
+        stored = [n for n, _ in done]
+        existing = set(names)
+        added = [n for n in stored if n not in existing]
+        if added:
+            self._save_names(names + added)
+        if error is not None:
+            raise error
+        return stored
+
+    def bulk_delete(self, names: list[str]) -> int:
+        """Delete several secrets, updating the metadata index once.
+        
+        If a keyring delete fails, the secrets that were deleted are still
+        dropped from the index before the error is raised.
+        
+        Args:
+            names: Secret names to delete
+            
+        Returns:
+            Number of secrets that existed and were deleted
+            
+        Raises:
+            ValueError: If any name is empty
+            OSError: If keyring or metadata update fails
+        """
+        targets = [_clean_name(n) for n in names]
+        if not targets:
+            return 0
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(targets))) as executor:
+            futures = [(n, executor.submit(self._remove, n)) for n in targets]
+        done, error = _settle(futures)
+        deleted = {n for n, ok in done if ok}
+        current = self._load_names()
+        remaining = [n for n in current if n not in deleted]
+        if len(remaining) != len(current):
+            self._save_names(remaining)
+        if error is not None:
+            raise error
+        return len(deleted)
+
+    def clear_cache(self) -> None:
+        """Drop all cached secret values from memory."""
+        self._cache.clear()
 
     def list_names(self) -> list[str]:
         """List all stored secret names (not values).
@@ -169,6 +589,40 @@ class SecretsStore:
         """
         return self._load_names()
 
+    def iter_secrets(self) -> Iterator[tuple[str, str]]:
+        """Yield ``(name, value)`` pairs for all stored secrets.
+        
+        Keyring lookups are I/O-bound, so they run concurrently on a small
+        thread pool. At most ``MAX_WORKERS`` lookups are in flight at a time,
+        so only that many values are held ahead of the consumer. Results are
+        yielded in metadata order; secrets missing from the keyring are
+        skipped.
+        
+        Yields:
+            Tuples of secret name and value
+            
+        Raises:
+            OSError: If keyring access fails
+        """
+        names = self._load_names()
+        if not names:
+            return
+        workers = min(MAX_WORKERS, len(names))
+        remaining = iter(names)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # executor.map would submit every lookup up front; keep a sliding
+            # window instead and refill it as the oldest lookup completes
+            window = deque(
+                (n, executor.submit(self._fetch, n)) for n in islice(remaining, workers)
+            )
+            while window:
+                n, future = window.popleft()
+                v = future.result()
+                for nxt in islice(remaining, 1):
+                    window.append((nxt, executor.submit(self._fetch, nxt)))
+                if v:
+                    yield n, v
+
     def export_env(self) -> dict[str, str]:
         """Export all secrets as environment variable dictionary.
         
@@ -178,9 +632,4 @@ class SecretsStore:
         Raises:
             OSError: If keyring access fails
         """
-        result: dict[str, str] = {}
-        for n in self._load_names():
-            v = self.get(n)
-            if v:
-                result[n] = v
-        return result
+        return dict(self.iter_secrets())
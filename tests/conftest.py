@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Optional
+from unittest.mock import Mock, patch
+
+import pytest
+from keyring.errors import PasswordDeleteError
+
+if TYPE_CHECKING:
+    import typer
+    from typer.testing import CliRunner
+
+
+class _FakeKeyring:
+    """Dict-backed stand-in for the keyring module and its backend."""
+    
+    def __init__(self) -> None:
+        self.storage: dict[str, str] = {}
+    
+    def get_keyring(self) -> _FakeKeyring:
+        return self
+    
+    def set_password(self, service: str, name: str, value: str) -> None:
+        self.storage[f"{service}:{name}"] = value
+    
+    def get_password(self, service: str, name: str) -> Optional[str]:
+        return self.storage.get(f"{service}:{name}")
+    
+    def delete_password(self, service: str, name: str) -> None:
+        key = f"{service}:{name}"
+        if key not in self.storage:
+            raise PasswordDeleteError("Item not found")
+        del self.storage[key]
+
+
+@pytest.fixture(scope="session")
+def cli() -> tuple[CliRunner, typer.Typer]:
+    """Shared CLI runner and app (stateless, so one pair serves the whole session).
+    
+    Imported here rather than at module level so runs that only select
+    storage tests don't load Typer, Click and the CLI module.
+    """
+    from typer.testing import CliRunner
+    
+    from ai_secrets.cli import app
+    
+    return CliRunner(), app
+
+
+@pytest.fixture(autouse=True, scope="module")
+def _patched_keyring() -> Iterator[_FakeKeyring]:
+    """Patch the keyring module once per test module with a fresh fake."""
+    fake = _FakeKeyring()
+    with patch("ai_secrets.storage.keyring", fake):
+        yield fake
+
+
+@pytest.fixture(autouse=True)
+def mock_keyring(_patched_keyring: _FakeKeyring) -> Iterator[_FakeKeyring]:
+    """Fake keyring with empty storage for each test."""
+    yield _patched_keyring
+    _patched_keyring.storage.clear()
+
+
+@pytest.fixture
+def spy_keyring(mock_keyring: _FakeKeyring, monkeypatch: pytest.MonkeyPatch) -> _FakeKeyring:
+    """Fake keyring whose methods record calls for assertions."""
+    for name in ("get_keyring", "get_password", "set_password", "delete_password"):
+        monkeypatch.setattr(mock_keyring, name, Mock(wraps=getattr(mock_keyring, name)))
+    return mock_keyring
@@ -1,216 +1,217 @@
 from __future__ import annotations
 
+import io
 import json
 from pathlib import Path
-from unittest.mock import patch
+from types import SimpleNamespace
 
-from typer.testing import CliRunner
+import pytest
+import typer
 
-from ai_secrets.cli import app
+from ai_secrets import SecretsStore
+from ai_secrets._json import loads as _loads
+from ai_secrets.cli import OutputFormat, delete, get, print_json
 
-runner = CliRunner()
+# Global options shared by every command invocation
+BASE = ("--service-name", "test")
 
+# Legacy metadata index listing KEY1 and KEY2
+_METADATA_BYTES = b'{"secrets":["KEY1","KEY2"]}'
 
-def test_help():
+
+def test_help(cli):
     """Test help command."""
+    runner, app = cli
     result = runner.invoke(app, ["--help"])
     assert result.exit_code == 0
     assert "AI-friendly Secrets Management CLI" in result.stdout
 
 
-def test_set_command(tmp_path: Path):
-    """Test set command."""
-    with patch("ai_secrets.storage.keyring") as mock_keyring:
-        result = runner.invoke(
-            app,
-            ["--service-name", "test", "--base-dir", str(tmp_path), "set", "TEST_KEY", "test_value"],
-        )
-        assert result.exit_code == 0
-        assert "stored securely" in result.stdout
-        mock_keyring.set_password.assert_called_once()
-
-
-def test_set_command_json(tmp_path: Path):
-    """Test set command with JSON output."""
-    with patch("ai_secrets.storage.keyring") as mock_keyring:
-        result = runner.invoke(
-            app,
-            ["--service-name", "test", "--base-dir", str(tmp_path), "set", "TEST_KEY", "test_value", "-f", "json"],
-        )
-        assert result.exit_code == 0
-        output = json.loads(result.stdout)
-        assert output["success"] is True
-        assert output["name"] == "TEST_KEY"
-
-
-def test_get_command(tmp_path: Path):
-    """Test get command."""
-    with patch("ai_secrets.storage.keyring") as mock_keyring:
-        mock_keyring.get_password.return_value = "test_value"
-        
-        result = runner.invoke(
-            app,
-            ["--service-name", "test", "--base-dir", str(tmp_path), "get", "TEST_KEY"],
-        )
-        assert result.exit_code == 0
-        assert "exists" in result.stdout
+# (seed store with KEY1/KEY2, command argv, expected stdout substring or JSON fields)
+COMMAND_CASES = [
+    pytest.param(False, ["set", "TEST_KEY", "test_value"], "stored securely", id="set"),
+    pytest.param(
+        False,
+        ["set", "TEST_KEY", "test_value", "-f", "json"],
+        {"success": True, "name": "TEST_KEY"},
+        id="set-json",
+    ),
+    pytest.param(True, ["get", "KEY1"], "exists", id="get"),
+    pytest.param(True, ["get", "KEY1", "--print"], "KEY1: value1", id="get-print"),
+    pytest.param(False, ["list"], "No secrets stored", id="list-empty"),
+    pytest.param(
+        False, ["list", "-f", "json"], {"success": True, "secrets": [], "count": 0}, id="list-json"
+    ),
+    pytest.param(
+        True,
+        ["status", "-f", "json"],
+        {"success": True, "service_name": "test", "secret_count": 2},
+        id="status-json",
+    ),
+    pytest.param(True, ["status", "-f", "table"], "Service Name: test", id="status-table"),
+    pytest.param(
+        True, ["export", "-f", "bash"], "export KEY1=value1\nexport KEY2=value2", id="export-bash"
+    ),
+    pytest.param(
+        True,
+        ["export", "-f", "json"],
+        {"success": True, "count": 2, "secrets": {"KEY1": "value1", "KEY2": "value2"}},
+        id="export-json",
+    ),
+]
+
+
+@pytest.fixture(scope="module")
+def seeded_store_dir(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Metadata directory listing KEY1 and KEY2, written once per module.
+    
+    Only read-only commands may use it; the keyring values are seeded per test.
+    """
+    store_dir = tmp_path_factory.mktemp("seeded") / ".secrets"
+    store_dir.mkdir()
+    (store_dir / "metadata_test.json").write_bytes(_METADATA_BYTES)
+    return store_dir
+
+
+@pytest.mark.parametrize("seeded,argv,expected", COMMAND_CASES)
+def test_command_output(cli, mock_keyring, request, seeded, argv, expected):
+    """Test command output in text and JSON formats."""
+    runner, app = cli
+    if seeded:
+        base_dir = request.getfixturevalue("seeded_store_dir")
+        mock_keyring.storage.update({"test:KEY1": "value1", "test:KEY2": "value2"})
+    else:
+        base_dir = request.getfixturevalue("tmp_path")
+    
+    result = runner.invoke(app, [*BASE, "--base-dir", str(base_dir), *argv])
+    assert result.exit_code == 0
+    if isinstance(expected, dict):
+        output = _loads(result.stdout_bytes)
+        for key, value in expected.items():
+            assert output[key] == value
+    else:
+        assert expected in result.stdout
 
 
-def test_get_command_print(tmp_path: Path):
-    """Test get command with --print flag."""
-    with patch("ai_secrets.storage.keyring") as mock_keyring:
-        mock_keyring.get_password.return_value = "test_value"
-        
-        result = runner.invoke(
-            app,
-            ["--service-name", "test", "--base-dir", str(tmp_path), "get", "TEST_KEY", "--print"],
-        )
-        assert result.exit_code == 0
-        assert "TEST_KEY: test_value" in result.stdout
+@pytest.fixture
+def ctx(tmp_path: Path) -> SimpleNamespace:
+    """Stand-in for the Typer context the main callback would prepare.
+    
+    Lets tests call command functions directly, skipping Click's parsing.
+    """
+    return SimpleNamespace(obj={"store": SecretsStore(service_name="test", base_dir=tmp_path)})
 
 
-def test_get_nonexistent(tmp_path: Path):
+def test_get_nonexistent(ctx, capsys):
     """Test get command for non-existent secret."""
-    with patch("ai_secrets.storage.keyring") as mock_keyring:
-        mock_keyring.get_password.return_value = None
-        
-        result = runner.invoke(
-            app,
-            ["--service-name", "test", "--base-dir", str(tmp_path), "get", "NONEXISTENT"],
-        )
-        assert result.exit_code == 1
-        assert "not found" in result.stdout
+    with pytest.raises(typer.Exit) as exc:
+        get(ctx, "NONEXISTENT", print_value=False, format=OutputFormat.TEXT, reveal=False)
+    assert exc.value.exit_code == 1
+    assert "not found" in capsys.readouterr().out
 
 
-def test_list_command_empty(tmp_path: Path):
-    """Test list command with no secrets."""
-    with patch("ai_secrets.storage.keyring"):
+def test_list_command_table_reused(cli, tmp_path: Path):
+    """Test list command renders correctly with a pooled table."""
+    runner, app = cli
+    (tmp_path / "metadata_test.json").write_text(json.dumps({"secrets": ["B_KEY", "A_KEY"]}))
+    for _ in range(2):
         result = runner.invoke(
             app,
-            ["--service-name", "test", "--base-dir", str(tmp_path), "list"],
+            [*BASE, "--base-dir", str(tmp_path), "list"],
         )
         assert result.exit_code == 0
-        assert "No secrets stored" in result.stdout
+        assert result.stdout.count("Name") == 1
+        assert result.stdout.index("A_KEY") < result.stdout.index("B_KEY")
 
 
-def test_list_command_json(tmp_path: Path):
-    """Test list command with JSON output."""
-    with patch("ai_secrets.storage.keyring"):
-        result = runner.invoke(
-            app,
-            ["--service-name", "test", "--base-dir", str(tmp_path), "list", "-f", "json"],
-        )
-        assert result.exit_code == 0
-        output = json.loads(result.stdout)
-        assert output["success"] is True
-        assert "secrets" in output
-        assert "count" in output
-        assert isinstance(output["secrets"], list)
+def test_list_command_large(cli, tmp_path: Path):
+    """Test list command prints plain sorted names for large stores."""
+    runner, app = cli
+    names = [f"KEY{i:03d}" for i in range(150, 0, -1)]
+    (tmp_path / "metadata_test.json").write_text(json.dumps({"secrets": names}))
+    result = runner.invoke(
+        app,
+        [*BASE, "--base-dir", str(tmp_path), "list"],
+    )
+    assert result.exit_code == 0
+    assert result.stdout.splitlines() == sorted(names)
 
 
-def test_delete_command(tmp_path: Path):
+def test_delete_command(ctx, spy_keyring, capsys):
     """Test delete command with confirmation."""
-    with patch("ai_secrets.storage.keyring") as mock_keyring:
-        mock_keyring.get_password.return_value = "test_value"
-        
-        result = runner.invoke(
-            app,
-            ["--service-name", "test", "--base-dir", str(tmp_path), "delete", "TEST_KEY", "--yes"],
-        )
-        assert result.exit_code == 0
-        assert "deleted" in result.stdout
-        mock_keyring.delete_password.assert_called_once()
+    spy_keyring.storage["test:TEST_KEY"] = "test_value"
+    
+    delete(ctx, "TEST_KEY", yes=True, format=OutputFormat.TEXT)
+    assert "deleted" in capsys.readouterr().out
+    spy_keyring.delete_password.assert_called_once()
+    spy_keyring.get_password.assert_not_called()
+
+
+def test_delete_requires_yes_without_tty(cli, spy_keyring, tmp_path: Path):
+    """Test that delete refuses to prompt when stdin is not a terminal."""
+    runner, app = cli
+    spy_keyring.storage["test:TEST_KEY"] = "test_value"
+    
+    result = runner.invoke(
+        app,
+        [*BASE, "--base-dir", str(tmp_path), "delete", "TEST_KEY"],
+        input="y\n",
+    )
+    assert result.exit_code == 2
+    assert "requires --yes" in result.stdout
+    spy_keyring.delete_password.assert_not_called()
 
 
-def test_delete_nonexistent(tmp_path: Path):
+def test_delete_nonexistent(ctx, capsys):
     """Test delete command for non-existent secret."""
-    with patch("ai_secrets.storage.keyring") as mock_keyring:
-        mock_keyring.get_password.return_value = None
-        
-        result = runner.invoke(
-            app,
-            ["--service-name", "test", "--base-dir", str(tmp_path), "delete", "NONEXISTENT", "--yes"],
-        )
-        assert result.exit_code == 1
-        assert "not found" in result.stdout
-
-
-def test_export_bash(tmp_path: Path):
-    """Test export command with bash format."""
-    with patch("ai_secrets.storage.keyring") as mock_keyring:
-        def mock_get_password(service: str, name: str):
-            return {"KEY1": "value1", "KEY2": "value2"}.get(name)
-        
-        mock_keyring.get_password.side_effect = mock_get_password
-        
-        store_dir = tmp_path / ".secrets"
-        store_dir.mkdir()
-        (store_dir / "metadata_test.json").write_text(json.dumps({"secrets": ["KEY1", "KEY2"]}))
-        
-        result = runner.invoke(
-            app,
-            ["--service-name", "test", "--base-dir", str(store_dir), "export", "-f", "bash"],
-        )
-        assert result.exit_code == 0
-        assert "export KEY1=value1" in result.stdout
-        assert "export KEY2=value2" in result.stdout
-        # Warning is printed to stderr, which is mixed with stdout in CliRunner
-        assert "WARNING" in result.stdout or result.exit_code == 0
-
-
-def test_export_json(tmp_path: Path):
-    """Test export command with JSON format."""
-    with patch("ai_secrets.storage.keyring") as mock_keyring:
-        def mock_get_password(service: str, name: str):
-            return {"KEY1": "value1", "KEY2": "value2"}.get(name)
-        
-        mock_keyring.get_password.side_effect = mock_get_password
-        
-        store_dir = tmp_path / ".secrets"
-        store_dir.mkdir()
-        (store_dir / "metadata_test.json").write_text(json.dumps({"secrets": ["KEY1", "KEY2"]}))
-        
-        result = runner.invoke(
-            app,
-            ["--service-name", "test", "--base-dir", str(store_dir), "export", "-f", "json"],
-        )
-        assert result.exit_code == 0
-        output = json.loads(result.stdout)
-        assert output["success"] is True
-        assert output["count"] == 2
-        assert output["secrets"]["KEY1"] == "value1"
-        assert output["secrets"]["KEY2"] == "value2"
-
-
-def test_status_json(tmp_path: Path):
-    """Test status command with JSON output."""
-    with patch("ai_secrets.storage.keyring"):
-        result = runner.invoke(
-            app,
-            ["--service-name", "test", "--base-dir", str(tmp_path), "status", "-f", "json"],
-        )
-        assert result.exit_code == 0
-        output = json.loads(result.stdout)
-        assert output["success"] is True
-        assert output["service_name"] == "test"
-        assert "secrets_file" in output
-        assert "secret_count" in output
+    with pytest.raises(typer.Exit) as exc:
+        delete(ctx, "NONEXISTENT", yes=True, format=OutputFormat.TEXT)
+    assert exc.value.exit_code == 1
+    assert "not found" in capsys.readouterr().out
+
+
+def test_delete_nonexistent_without_yes(ctx, capsys):
+    """Test that a missing secret is reported before asking for confirmation."""
+    with pytest.raises(typer.Exit) as exc:
+        delete(ctx, "NONEXISTENT", yes=False, format=OutputFormat.JSON)
+    assert exc.value.exit_code == 1
+    assert "not found" in capsys.readouterr().out
+
+
+def test_export_bash_quotes_values(cli, mock_keyring, tmp_path: Path):
+    """Test that bash export quotes values containing shell metacharacters."""
+    runner, app = cli
+    mock_keyring.storage["test:KEY1"] = "it's $(rm -rf ~)"
+    (tmp_path / "metadata_test.json").write_text(json.dumps({"secrets": ["KEY1"]}))
+    
+    result = runner.invoke(
+        app,
+        [*BASE, "--base-dir", str(tmp_path), "export", "-f", "bash"],
+    )
+    assert result.exit_code == 0
+    assert "export KEY1='it'\"'\"'s $(rm -rf ~)'" in result.stdout
 
 
-def test_status_table(tmp_path: Path):
-    """Test status command with table output."""
-    with patch("ai_secrets.storage.keyring"):
-        result = runner.invoke(
-            app,
-            ["--service-name", "test", "--base-dir", str(tmp_path), "status", "-f", "table"],
-        )
-        assert result.exit_code == 0
-        assert "Service Name: test" in result.stdout
-        assert "Secrets Count:" in result.stdout
+def test_export_bash_skips_invalid_names(cli, mock_keyring, tmp_path: Path):
+    """Test that bash export refuses names that would inject shell commands."""
+    runner, app = cli
+    mock_keyring.storage.update({"test:X=1;touch /tmp/pwned;Y": "v", "test:KEY1": "value1"})
+    (tmp_path / "metadata_test.json").write_text(
+        json.dumps({"secrets": ["X=1;touch /tmp/pwned;Y", "KEY1"]})
+    )
+    
+    result = runner.invoke(
+        app,
+        [*BASE, "--base-dir", str(tmp_path), "export", "-f", "bash"],
+    )
+    assert result.exit_code == 0
+    assert result.stdout == "export KEY1=value1\n"
+    assert "not a valid environment variable name" in result.stderr
 
 
-def test_empty_service_name():
+def test_empty_service_name(cli):
     """Test that empty service name is rejected."""
+    runner, app = cli
     result = runner.invoke(
         app,
         ["--service-name", "", "list"],
@@ -218,3 +219,33 @@ def test_empty_service_name():
     assert result.exit_code == 1
     assert "cannot be empty" in result.stdout
 
+
+def test_json_output_without_orjson(cli, tmp_path: Path, monkeypatch):
+    """Test JSON output through the stdlib encoder fallback."""
+    runner, app = cli
+    monkeypatch.setattr("ai_secrets._json.orjson", None)
+    result = runner.invoke(
+        app,
+        [*BASE, "--base-dir", str(tmp_path), "set", "TEST_KEY", "wert-ä", "-f", "json"],
+    )
+    assert result.exit_code == 0
+    assert result.stdout.startswith('{"success":true,')
+    assert json.loads(result.stdout)["name"] == "TEST_KEY"
+
+
+def test_print_json_indents_for_tty():
+    """Test that JSON output is pretty-printed for interactive terminals."""
+    class TTY(io.StringIO):
+        def isatty(self) -> bool:
+            return True
+    
+    stream = TTY()
+    print_json({"success": True}, file=stream)
+    assert stream.getvalue() == '{\n  "success": true\n}\n'
+
+
+def test_print_json_bypasses_text_encoding():
+    """Test that non-ASCII values survive a stream with a legacy encoding."""
+    stream = io.TextIOWrapper(io.BytesIO(), encoding="cp1252")
+    print_json({"value": "café → 中"}, file=stream)
+    assert stream.buffer.getvalue().decode("utf-8") == '{"value":"café → 中"}\n'
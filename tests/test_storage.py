@@ -1,43 +1,27 @@
 from __future__ import annotations
 
 import json
-import sys
 from pathlib import Path
 from unittest.mock import Mock, patch
 
 import pytest
+from pyfakefs.fake_filesystem import FakeFilesystem
 
 from ai_secrets.storage import SecretsStore
 
 
 @pytest.fixture
-def temp_store(tmp_path: Path) -> SecretsStore:
-    """Create a temporary SecretsStore for testing."""
-    return SecretsStore(service_name="test-service", base_dir=tmp_path / ".secrets")
+def base_dir(fs_module: FakeFilesystem, request: pytest.FixtureRequest) -> Path:
+    """Empty per-test directory on the module's in-memory filesystem."""
+    path = Path("/secrets", request.node.name)
+    fs_module.create_dir(path)
+    return path
 
 
 @pytest.fixture
-def mock_keyring():
-    """Mock the keyring module."""
-    with patch("ai_secrets.storage.keyring") as mock:
-        storage = {}
-        
-        def set_password(service: str, name: str, value: str) -> None:
-            storage[f"{service}:{name}"] = value
-        
-        def get_password(service: str, name: str) -> str | None:
-            return storage.get(f"{service}:{name}")
-        
-        def delete_password(service: str, name: str) -> None:
-            key = f"{service}:{name}"
-            if key in storage:
-                del storage[key]
-        
-        mock.set_password = Mock(side_effect=set_password)
-        mock.get_password = Mock(side_effect=get_password)
-        mock.delete_password = Mock(side_effect=delete_password)
-        
-        yield mock
+def temp_store(base_dir: Path) -> SecretsStore:
+    """Create a temporary SecretsStore for testing."""
+    return SecretsStore(service_name="test-service", base_dir=base_dir / ".secrets")
 
 
 def test_init_default():
@@ -48,29 +32,50 @@ def test_init_default():
     assert store.metadata_file == store.base_dir / "metadata_ai-secrets.json"
 
 
-def test_init_custom(tmp_path: Path):
+def test_init_custom(base_dir: Path):
     """Test initialization with custom parameters."""
-    custom_dir = tmp_path / "custom"
+    custom_dir = base_dir / "custom"
     store = SecretsStore(service_name="my-service", base_dir=custom_dir)
     assert store.service_name == "my-service"
     assert store.base_dir == custom_dir
     assert store.metadata_file == custom_dir / "metadata_my-service.json"
 
 
-def test_init_empty_service_name():
-    """Test that empty service_name raises ValueError."""
-    with pytest.raises(ValueError, match="service_name cannot be empty"):
-        SecretsStore(service_name="")
-    
-    with pytest.raises(ValueError, match="service_name cannot be empty"):
-        SecretsStore(service_name="   ")
+def test_init_service_name_with_separators(base_dir: Path):
+    """Test that path separators in service names are sanitized."""
+    store = SecretsStore(service_name="org/app\\prod", base_dir=base_dir)
+    assert store.metadata_file == base_dir / "metadata_org_app_prod.json"
 
 
-def test_set_and_get(temp_store: SecretsStore, mock_keyring):
+@pytest.mark.parametrize("service_name", ["", "   "])
+def test_init_empty_service_name(service_name: str):
+    """Test that empty service_name raises ValueError."""
+    with pytest.raises(ValueError, match="service_name cannot be empty"):
+        SecretsStore(service_name=service_name)
+
+
+@pytest.mark.parametrize(
+    "method,args,message",
+    [
+        ("set", ("", "value"), "Secret name cannot be empty"),
+        ("set", ("   ", "value"), "Secret name cannot be empty"),
+        ("set", ("KEY", ""), "Secret value cannot be empty"),
+        ("get", ("",), "Secret name cannot be empty"),
+        ("delete", ("",), "Secret name cannot be empty"),
+        ("bulk_delete", (["KEY", ""],), "Secret name cannot be empty"),
+    ],
+)
+def test_empty_rejected(temp_store: SecretsStore, method: str, args: tuple, message: str):
+    """Test that empty names and values raise ValueError."""
+    with pytest.raises(ValueError, match=message):
+        getattr(temp_store, method)(*args)
+
+
+def test_set_and_get(temp_store: SecretsStore, spy_keyring):
     """Test storing and retrieving a secret."""
     temp_store.set("TEST_KEY", "test_value")
     
-    mock_keyring.set_password.assert_called_once_with("test-service", "TEST_KEY", "test_value")
+    spy_keyring.set_password.assert_called_once_with("test-service", "TEST_KEY", "test_value")
     
     value = temp_store.get("TEST_KEY")
     assert value == "test_value"
@@ -80,19 +85,13 @@ def test_set_and_get(temp_store: SecretsStore, mock_keyring):
     assert "TEST_KEY" in metadata["secrets"]
 
 
-def test_set_empty_name(temp_store: SecretsStore, mock_keyring):
-    """Test that empty name raises ValueError."""
-    with pytest.raises(ValueError, match="Secret name cannot be empty"):
-        temp_store.set("", "value")
+def test_set_strips_name(temp_store: SecretsStore, spy_keyring):
+    """Test that names are stored without surrounding whitespace."""
+    temp_store.set("  KEY  ", "value")
     
-    with pytest.raises(ValueError, match="Secret name cannot be empty"):
-        temp_store.set("   ", "value")
-
-
-def test_set_empty_value(temp_store: SecretsStore, mock_keyring):
-    """Test that empty value raises ValueError."""
-    with pytest.raises(ValueError, match="Secret value cannot be empty"):
-        temp_store.set("KEY", "")
+    spy_keyring.set_password.assert_called_once_with("test-service", "KEY", "value")
+    assert temp_store.list_names() == ["KEY"]
+    assert temp_store.get(" KEY") == "value"
 
 
 def test_get_nonexistent(temp_store: SecretsStore, mock_keyring):
@@ -101,12 +100,6 @@ def test_get_nonexistent(temp_store: SecretsStore, mock_keyring):
     assert value is None
 
 
-def test_get_empty_name(temp_store: SecretsStore, mock_keyring):
-    """Test that empty name raises ValueError."""
-    with pytest.raises(ValueError, match="Secret name cannot be empty"):
-        temp_store.get("")
-
-
 def test_list_names_empty(temp_store: SecretsStore):
     """Test listing names when no secrets exist."""
     names = temp_store.list_names()
@@ -115,9 +108,7 @@ def test_list_names_empty(temp_store: SecretsStore):
 
 def test_list_names(temp_store: SecretsStore, mock_keyring):
     """Test listing secret names."""
-    temp_store.set("KEY1", "value1")
-    temp_store.set("KEY2", "value2")
-    temp_store.set("KEY3", "value3")
+    temp_store.set_many({"KEY1": "value1", "KEY2": "value2", "KEY3": "value3"})
     
     names = temp_store.list_names()
     assert set(names) == {"KEY1", "KEY2", "KEY3"}
@@ -135,23 +126,16 @@ def test_delete(temp_store: SecretsStore, mock_keyring):
     assert "DELETE_ME" not in temp_store.list_names()
 
 
-def test_delete_nonexistent(temp_store: SecretsStore, mock_keyring):
+def test_delete_nonexistent(temp_store: SecretsStore, spy_keyring):
     """Test deleting a non-existent secret."""
     result = temp_store.delete("NONEXISTENT")
     assert result is False
-
-
-def test_delete_empty_name(temp_store: SecretsStore, mock_keyring):
-    """Test that empty name raises ValueError."""
-    with pytest.raises(ValueError, match="Secret name cannot be empty"):
-        temp_store.delete("")
+    spy_keyring.get_password.assert_not_called()
 
 
 def test_export_env(temp_store: SecretsStore, mock_keyring):
     """Test exporting secrets as environment variables."""
-    temp_store.set("KEY1", "value1")
-    temp_store.set("KEY2", "value2")
-    temp_store.set("KEY3", "value3")
+    temp_store.set_many({"KEY1": "value1", "KEY2": "value2", "KEY3": "value3"})
     
     exports = temp_store.export_env()
     assert exports == {
@@ -189,22 +173,344 @@ def test_duplicate_secret_update_metadata_once(temp_store: SecretsStore, mock_ke
     assert temp_store.get("KEY") == "value2"
 
 
-def test_metadata_file_invalid_json(temp_store: SecretsStore, mock_keyring):
-    """Test handling of corrupted metadata file."""
+def test_overwrite_skips_metadata_write(temp_store: SecretsStore, mock_keyring):
+    """Test that overwriting a known secret doesn't rewrite metadata."""
+    temp_store.set("KEY", "value1")
+    
+    with patch.object(SecretsStore, "_save_names") as save:
+        temp_store.set("KEY", "value2")
+        save.assert_not_called()
+    assert temp_store.get("KEY") == "value2"
+
+
+# (metadata file contents, expected names or exception type)
+METADATA_CASES = [
+    pytest.param(b'{"v":1,"secrets":["KEY1","KEY2"]}', ["KEY1", "KEY2"], id="v1"),
+    pytest.param(b'{"secrets":["KEY1","KEY2"]}', ["KEY1", "KEY2"], id="legacy-list"),
+    pytest.param(b'{"secrets":{"KEY1":{},"KEY2":{}}}', ["KEY1", "KEY2"], id="legacy-dict"),
+    pytest.param(b"invalid json{", ValueError, id="invalid-json"),
+]
+
+
+@pytest.mark.parametrize("payload,expected", METADATA_CASES)
+def test_metadata_formats(temp_store: SecretsStore, payload: bytes, expected):
+    """Test reading current, legacy and corrupted metadata files."""
+    temp_store.base_dir.mkdir(exist_ok=True)
+    temp_store.metadata_file.write_bytes(payload)
+    
+    if isinstance(expected, type):
+        with pytest.raises(expected, match="Invalid JSON"):
+            temp_store.list_names()
+    else:
+        assert sorted(temp_store.list_names()) == expected
+
+
+def test_metadata_file_legacy_upgraded(temp_store: SecretsStore, mock_keyring):
+    """Test that the next write upgrades legacy metadata to the versioned format."""
     temp_store.base_dir.mkdir(exist_ok=True)
-    temp_store.metadata_file.write_text("invalid json{")
+    temp_store.metadata_file.write_bytes(b'{"secrets":["KEY1","KEY2"]}')
+    
+    temp_store.set("KEY3", "value3")
+    assert json.loads(temp_store.metadata_file.read_text()) == {
+        "v": 1,
+        "secrets": ["KEY1", "KEY2", "KEY3"],
+    }
+
+
+def test_backend_resolved_once(temp_store: SecretsStore, spy_keyring):
+    """Test that the keyring backend is looked up once and can be injected."""
+    temp_store.set("KEY", "value")
+    temp_store.get("KEY")
+    spy_keyring.get_keyring.assert_called_once()
+    
+    fake = Mock()
+    fake.get_password.return_value = "injected"
+    temp_store.backend = fake
+    assert temp_store.get("KEY") == "injected"
+
+
+def test_cache_avoids_repeated_keyring_reads(base_dir: Path, spy_keyring):
+    """Test that cached stores hit the keyring only once per secret."""
+    store = SecretsStore(service_name="test-service", base_dir=base_dir, enable_cache=True)
+    store.set("KEY", "value")
+    
+    assert store.get("KEY") == "value"
+    assert store.get("KEY") == "value"
+    assert spy_keyring.get_password.call_count == 1
+
+
+def test_cache_invalidated_on_set_and_delete(base_dir: Path, mock_keyring):
+    """Test that set and delete drop stale cache entries."""
+    store = SecretsStore(service_name="test-service", base_dir=base_dir, enable_cache=True)
+    store.set("KEY", "value1")
+    assert store.get("KEY") == "value1"
+    
+    store.set("KEY", "value2")
+    assert store.get("KEY") == "value2"
+    
+    store.delete("KEY")
+    assert store.get("KEY") is None
+
+
+def test_cache_disabled_by_default(temp_store: SecretsStore, spy_keyring):
+    """Test that stores without caching always query the keyring."""
+    temp_store.set("KEY", "value")
+    temp_store.get("KEY")
+    temp_store.get("KEY")
+    
+    assert spy_keyring.get_password.call_count == 2
+    assert temp_store._cache == {}
+
+
+def test_clear_cache(base_dir: Path, spy_keyring):
+    """Test that clear_cache forces a fresh keyring lookup."""
+    store = SecretsStore(service_name="test-service", base_dir=base_dir, enable_cache=True)
+    store.set("KEY", "value")
+    store.get("KEY")
+    
+    store.clear_cache()
+    store.get("KEY")
+    assert spy_keyring.get_password.call_count == 2
+
+
+def test_export_env_preserves_order(temp_store: SecretsStore, mock_keyring):
+    """Test that concurrent export keeps metadata order and skips missing values."""
+    names = [f"KEY{i}" for i in range(20)]
+    temp_store.set_many({n: f"value-{n}" for n in names})
+    mock_keyring.delete_password("test-service", "KEY5")
+    
+    exports = temp_store.export_env()
+    assert list(exports) == [n for n in names if n != "KEY5"]
+    assert exports["KEY19"] == "value-KEY19"
+
+
+@pytest.fixture
+def log_store(base_dir: Path) -> SecretsStore:
+    """Create a temporary SecretsStore using the append-only metadata log."""
+    return SecretsStore(
+        service_name="test-service", base_dir=base_dir / ".secrets", legacy_format=False
+    )
+
+
+def test_log_format_appends(log_store: SecretsStore, mock_keyring):
+    """Test that the log format appends one record per new name."""
+    assert log_store.metadata_file.name == "metadata_test-service.log"
+    log_store.set("KEY1", "value1")
+    log_store.set("KEY2", "value2")
+    log_store.set("KEY1", "value3")
+    
+    lines = log_store.metadata_file.read_text().splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"op": "add", "name": "KEY1"},
+        {"op": "add", "name": "KEY2"},
+    ]
+    assert log_store.list_names() == ["KEY1", "KEY2"]
+
+
+def test_log_format_delete_and_compact(log_store: SecretsStore, mock_keyring):
+    """Test that deletes are replayed and the log is compacted when it grows."""
+    log_store.set("KEY1", "value1")
+    log_store.set("KEY2", "value2")
+    assert log_store.delete("KEY1") is True
+    
+    # 3 lines for 1 live name exceeds the compaction ratio
+    lines = log_store.metadata_file.read_text().splitlines()
+    assert [json.loads(line) for line in lines] == [{"op": "add", "name": "KEY2"}]
+    assert log_store.list_names() == ["KEY2"]
+    assert log_store.compact() is False
+
+
+def test_log_format_delete_reuses_line_count(log_store: SecretsStore, mock_keyring):
+    """Test that deciding whether to compact doesn't re-read the log."""
+    log_store.set_many({f"KEY{i}": "value" for i in range(4)})
+    
+    with patch.object(
+        SecretsStore, "_read_log", autospec=True, side_effect=SecretsStore._read_log
+    ) as read_log:
+        assert log_store.delete("KEY0") is True
+        read_log.assert_not_called()
+    assert log_store.list_names() == ["KEY1", "KEY2", "KEY3"]
+
+
+def test_log_format_seeded_from_json(temp_store: SecretsStore, mock_keyring):
+    """Test that switching an existing store to the log keeps its secrets."""
+    temp_store.set_many({"KEY1": "value1", "KEY2": "value2"})
+    
+    log_store = SecretsStore(
+        service_name="test-service", base_dir=temp_store.base_dir, legacy_format=False
+    )
+    assert log_store.list_names() == ["KEY1", "KEY2"]
+    assert log_store.metadata_file.exists()
+    
+    log_store.set("KEY3", "value3")
+    assert log_store.export_env() == {"KEY1": "value1", "KEY2": "value2", "KEY3": "value3"}
+
+
+def test_log_format_invalid_line(log_store: SecretsStore, mock_keyring):
+    """Test handling of a corrupted metadata log."""
+    log_store.base_dir.mkdir()
+    log_store.metadata_file.write_text('{"op": "add", "name": "KEY1"}\ninvalid json{\n')
     
     with pytest.raises(ValueError, match="Invalid JSON"):
+        log_store.list_names()
+
+
+def test_load_names_memoized(temp_store: SecretsStore, mock_keyring):
+    """Test that unchanged metadata is not re-parsed."""
+    temp_store.set("KEY1", "value1")
+    
+    with patch.object(
+        SecretsStore, "_parse_names", autospec=True, side_effect=SecretsStore._parse_names
+    ) as parse:
         temp_store.list_names()
+        temp_store.list_names()
+        parse.assert_not_called()
+        
+        temp_store.metadata_file.write_text(json.dumps({"secrets": ["KEY1", "OTHER"]}))
+        assert temp_store.list_names() == ["KEY1", "OTHER"]
+        parse.assert_called_once()
 
 
-def test_metadata_file_legacy_dict_format(temp_store: SecretsStore, mock_keyring):
-    """Test compatibility with old dict-based metadata format."""
-    temp_store.base_dir.mkdir(exist_ok=True)
-    temp_store.metadata_file.write_text(json.dumps({
-        "secrets": {"KEY1": {}, "KEY2": {}}
-    }))
+def test_metadata_without_orjson(temp_store: SecretsStore, mock_keyring, monkeypatch):
+    """Test that metadata round-trips through the stdlib json fallback."""
+    monkeypatch.setattr("ai_secrets._json.orjson", None)
+    temp_store.set("KEY1", "value1")
+    temp_store.clear_cache()
+    temp_store._names_cache = None
     
-    names = temp_store.list_names()
-    assert set(names) == {"KEY1", "KEY2"}
+    assert temp_store.list_names() == ["KEY1"]
+    assert json.loads(temp_store.metadata_file.read_text()) == {"v": 1, "secrets": ["KEY1"]}
+
+
+def test_iter_secrets(temp_store: SecretsStore, mock_keyring):
+    """Test streaming secrets as (name, value) pairs."""
+    temp_store.set_many({"KEY1": "value1", "KEY2": "value2"})
+    
+    secrets = temp_store.iter_secrets()
+    assert next(secrets) == ("KEY1", "value1")
+    assert list(secrets) == [("KEY2", "value2")]
+
+
+def test_iter_secrets_bounds_lookups(temp_store: SecretsStore, mock_keyring, monkeypatch):
+    """Test that only a window of keyring lookups runs ahead of the consumer."""
+    monkeypatch.setattr("ai_secrets.storage.MAX_WORKERS", 2)
+    temp_store.set_many({f"KEY{i:02d}": "value" for i in range(20)})
+    
+    with patch.object(
+        SecretsStore, "_fetch", autospec=True, side_effect=SecretsStore._fetch
+    ) as fetch:
+        secrets = temp_store.iter_secrets()
+        assert next(secrets) == ("KEY00", "value")
+        assert fetch.call_count <= 3
+        assert len(list(secrets)) == 19
+
+
+def test_copy_from(base_dir: Path, mock_keyring):
+    """Test copying secrets between stores with a single metadata write."""
+    old = SecretsStore(service_name="old-service", base_dir=base_dir)
+    new = SecretsStore(service_name="new-service", base_dir=base_dir)
+    old.set("KEY1", "value1")
+    old.set("KEY2", "value2")
+    new.set("KEY2", "existing")
+    
+    with patch.object(
+        SecretsStore, "_save_names", autospec=True, side_effect=SecretsStore._save_names
+    ) as save:
+        assert new.copy_from(old) == 1
+        save.assert_called_once()
+    assert new.export_env() == {"KEY2": "existing", "KEY1": "value1"}
+    
+    assert new.copy_from(old, overwrite=True) == 2
+    assert new.get("KEY2") == "value2"
+
+
+@pytest.fixture
+def failing_keyring(mock_keyring, monkeypatch: pytest.MonkeyPatch):
+    """Fake keyring whose writes and deletes fail for the secret named "BAD".
+    
+    Secrets stored before the test calls ``fail()`` are unaffected.
+    """
+    set_password = mock_keyring.set_password
+    delete_password = mock_keyring.delete_password
+    
+    def failing_set(service: str, name: str, value: str) -> None:
+        if name == "BAD":
+            raise RuntimeError("keyring locked")
+        set_password(service, name, value)
+    
+    def failing_delete(service: str, name: str) -> None:
+        if name == "BAD":
+            raise RuntimeError("keyring locked")
+        delete_password(service, name)
+    
+    def fail() -> None:
+        monkeypatch.setattr(mock_keyring, "set_password", failing_set)
+        monkeypatch.setattr(mock_keyring, "delete_password", failing_delete)
+    
+    return fail
+
+
+def test_copy_from_indexes_partial_writes(base_dir: Path, failing_keyring):
+    """Test that secrets stored before a keyring failure still get indexed."""
+    old = SecretsStore(service_name="old-service", base_dir=base_dir)
+    new = SecretsStore(service_name="new-service", base_dir=base_dir)
+    old.set_many({"A": "1", "BAD": "2", "C": "3"})
+    
+    failing_keyring()
+    with pytest.raises(OSError, match="keyring locked"):
+        new.copy_from(old)
+    assert new.list_names() == ["A", "C"]
+
+
+def test_bulk_delete_unindexes_partial_deletes(temp_store: SecretsStore, failing_keyring):
+    """Test that secrets deleted before a keyring failure leave the index."""
+    temp_store.set_many({"A": "1", "BAD": "2", "C": "3"})
+    
+    failing_keyring()
+    with pytest.raises(OSError, match="keyring locked"):
+        temp_store.bulk_delete(["A", "BAD", "C"])
+    assert temp_store.list_names() == ["BAD"]
+
+
+def test_copy_from_missing_source(base_dir: Path, spy_keyring):
+    """Test that copying from a store without metadata is a no-op."""
+    old = SecretsStore(service_name="old-service", base_dir=base_dir / "gone")
+    new = SecretsStore(service_name="new-service", base_dir=base_dir)
+    
+    assert new.copy_from(old) == 0
+    spy_keyring.get_keyring.assert_not_called()
+    assert not new.metadata_file.exists()
+
+
+def test_bulk_delete(temp_store: SecretsStore, mock_keyring):
+    """Test deleting several secrets at once."""
+    temp_store.set_many({"KEY1": "value1", "KEY2": "value2", "KEY3": "value3"})
+    
+    assert temp_store.bulk_delete(["KEY1", "KEY3", "MISSING"]) == 2
+    assert temp_store.list_names() == ["KEY2"]
+    assert temp_store.get("KEY1") is None
+
+
+def test_set_many(temp_store: SecretsStore, mock_keyring):
+    """Test storing several secrets with a single metadata write."""
+    temp_store.set("KEY1", "old")
+    
+    with patch.object(
+        SecretsStore, "_save_names", autospec=True, side_effect=SecretsStore._save_names
+    ) as save:
+        temp_store.set_many({"KEY1": "value1", " KEY2 ": "value2"})
+        save.assert_called_once()
+    assert temp_store.list_names() == ["KEY1", "KEY2"]
+    assert temp_store.get("KEY1") == "value1"
+    
+    with pytest.raises(ValueError, match="Secret value cannot be empty"):
+        temp_store.set_many({"KEY3": "value3", "KEY4": ""})
+    assert temp_store.get("KEY3") is None
+
 
+def test_set_many_indexes_partial_writes(temp_store: SecretsStore, failing_keyring):
+    """Test that secrets stored before a keyring failure still get indexed."""
+    failing_keyring()
+    with pytest.raises(OSError, match="keyring locked"):
+        temp_store.set_many({"A": "1", "BAD": "2", "C": "3"})
+    assert temp_store.list_names() == ["A", "C"]
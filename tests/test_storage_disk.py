@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+from ai_secrets.storage import SecretsStore
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX permissions only")
+def test_metadata_file_permissions(tmp_path: Path, mock_keyring):
+    """Test that metadata is written atomically with owner-only permissions.
+    
+    Runs on the real filesystem so mkstemp, os.replace and the mode bits
+    aren't pyfakefs emulations.
+    """
+    store = SecretsStore(service_name="test-service", base_dir=tmp_path / ".secrets")
+    store.set("KEY1", "value1")
+    store.set("KEY2", "value2")
+    
+    assert store.metadata_file.stat().st_mode & 0o777 == 0o600
+    assert [p.name for p in store.base_dir.iterdir()] == [store.metadata_file.name]